@@ -5,6 +5,14 @@ import pandas as pd
 import altair as alt
 import io
 import re
+import os
+import json
+import zlib
+import uuid
+import sqlite3
+import logging
+import threading
+from contextlib import closing
 from fpdf import FPDF
 from pptx import Presentation
 from pptx.util import Inches, Pt
@@ -20,12 +28,14 @@ def strip_emojis(text):
     # Remove non-ASCII characters (emojis) for FPDF compatibility
     return re.sub(r'[^\x00-\x7F]+', '', text)
 
+@st.cache_data(show_spinner=False)
 def to_excel(df):
     output = io.BytesIO()
     with pd.ExcelWriter(output, engine='openpyxl') as writer:
         df.to_excel(writer, index=False, sheet_name='Sheet1')
     return output.getvalue()
 
+@st.cache_data(show_spinner=False)
 def to_pdf(title, df, insights):
     pdf = FPDF()
     pdf.add_page()
@@ -52,6 +62,7 @@ def to_pdf(title, df, insights):
         pdf.ln()
     return bytes(pdf.output())
 
+@st.cache_data(show_spinner=False)
 def to_ppt(title, df, insights):
     prs = Presentation()
     slide_layout = prs.slide_layouts[1] # Title and Content
@@ -138,6 +149,186 @@ def render_executive_summary():
 
 st.title("🏭 Cuing Agent")
 
+# --- Session Persistence ---
+SNAPSHOT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cuing_sessions.db")
+SNAPSHOT_VERSION = 1
+SNAPSHOT_TTL = 30 * 24 * 3600  # seconds before an untouched session is pruned
+SNAPSHOT_PRUNE_INTERVAL = 3600
+SNAPSHOT_RETRY_DELAY = 1.0
+SNAPSHOT_RETRY_MAX_DELAY = 300.0
+SNAPSHOT_MAX_PENDING = 1000  # unwritten sessions kept in memory while SQLite is failing
+PERSISTED_WIDGET_PREFIXES = ("next_edits_", "next_summary_", "scrap_view_input_")
+
+logger = logging.getLogger(__name__)
+
+
+def encode_snapshot(state):
+    """Pack the conversation state into a compact versioned blob.
+
+    Only references are stored: user text, the step each assistant message
+    points at, the Yes/No answers and persisted widget toggles. Rendered
+    output is rebuilt from the block definitions and cached exports.
+    """
+    messages = [
+        ["u", m["content"]] if m["role"] == "user" else ["a", m.get("step", 0)]
+        for m in state.messages
+    ]
+    widgets = {
+        k: state[k]
+        for k in state
+        if isinstance(k, str) and k.startswith(PERSISTED_WIDGET_PREFIXES)
+    }
+    payload = {"s": state.step, "a": state.answers, "m": messages, "w": widgets}
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return bytes([SNAPSHOT_VERSION]) + zlib.compress(raw, 9)
+
+
+def decode_snapshot(blob):
+    """Unpack a blob from encode_snapshot; None if it is missing or unreadable."""
+    if not blob or blob[0] != SNAPSHOT_VERSION:
+        return None
+    try:
+        payload = json.loads(zlib.decompress(blob[1:]).decode("utf-8"))
+        messages = [
+            {"role": "user", "content": v} if r == "u" else {"role": "assistant", "step": v}
+            for r, v in payload["m"]
+        ]
+        return {"step": payload["s"], "answers": payload["a"], "messages": messages, "widgets": payload["w"]}
+    except (zlib.error, ValueError, KeyError, TypeError):
+        logger.warning("Discarding unreadable session snapshot")
+        return None
+
+
+class SnapshotStore:
+    """SQLite-backed snapshot store with a background writer thread.
+
+    submit() only records the newest blob per session in memory; the writer
+    drains that map into SQLite, and load() consults it first so a reload
+    never sees a snapshot older than the last one submitted.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.latest = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        with closing(sqlite3.connect(path)) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                "session_id TEXT PRIMARY KEY, payload BLOB NOT NULL, updated REAL NOT NULL)"
+            )
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def load(self, session_id):
+        with self.lock:
+            if session_id in self.latest:
+                return self.latest[session_id]
+        try:
+            with closing(sqlite3.connect(self.path)) as conn:
+                row = conn.execute(
+                    "SELECT payload FROM snapshots WHERE session_id = ?", (session_id,)
+                ).fetchone()
+        except sqlite3.Error:
+            logger.exception("Failed to load session snapshot %s", session_id)
+            return None
+        return row[0] if row else None
+
+    def submit(self, session_id, blob):
+        with self.lock:
+            # Re-insert so dict order tracks recency; evict the stalest if the writer is stuck
+            self.latest.pop(session_id, None)
+            self.latest[session_id] = blob
+            while len(self.latest) > SNAPSHOT_MAX_PENDING:
+                del self.latest[next(iter(self.latest))]
+        self.wakeup.set()
+
+    def _run(self):
+        last_pruned = 0.0
+        failures = 0
+        with closing(sqlite3.connect(self.path)) as conn:
+            while True:
+                self.wakeup.wait()
+                self.wakeup.clear()
+                # Coalesce bursts of reruns: only the newest blob per session is written
+                with self.lock:
+                    pending = dict(self.latest)
+                if not pending:
+                    continue
+                try:
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO snapshots (session_id, payload, updated) VALUES (?, ?, ?) "
+                            "ON CONFLICT(session_id) DO UPDATE SET "
+                            "payload = excluded.payload, updated = excluded.updated",
+                            [(sid, blob, time.time()) for sid, blob in pending.items()],
+                        )
+                        if time.time() - last_pruned >= SNAPSHOT_PRUNE_INTERVAL:
+                            conn.execute(
+                                "DELETE FROM snapshots WHERE updated < ?", (time.time() - SNAPSHOT_TTL,)
+                            )
+                            last_pruned = time.time()
+                except sqlite3.Error:
+                    # Leave the batch in self.latest and retry with exponential backoff
+                    if failures == 0:
+                        logger.exception("Failed to write session snapshots; retrying")
+                    failures += 1
+                    time.sleep(min(SNAPSHOT_RETRY_DELAY * 2 ** (failures - 1), SNAPSHOT_RETRY_MAX_DELAY))
+                    self.wakeup.set()
+                    continue
+                if failures:
+                    logger.warning("Session snapshot writes recovered after %d failed attempts", failures)
+                    failures = 0
+                with self.lock:
+                    for sid, blob in pending.items():
+                        if self.latest.get(sid) is blob:
+                            del self.latest[sid]
+
+
+@st.cache_resource
+def get_snapshot_store():
+    return SnapshotStore(SNAPSHOT_DB)
+
+
+def get_session_id():
+    """Return the session id carried in the URL, creating one on first visit."""
+    sid = st.query_params.get("sid", "")
+    if not re.fullmatch(r"[0-9a-f]{32}", sid):
+        sid = uuid.uuid4().hex
+        st.query_params["sid"] = sid
+    return sid
+
+
+def hydrate_session(store, session_id):
+    """Restore a saved snapshot into session state; no thinking/streaming replay."""
+    snapshot = decode_snapshot(store.load(session_id))
+    if snapshot is None:
+        return
+    st.session_state.messages = snapshot["messages"]
+    st.session_state.answers = snapshot["answers"]
+    st.session_state.step = snapshot["step"]
+    st.session_state.streaming_done = True
+    for key, value in snapshot["widgets"].items():
+        st.session_state.setdefault(key, value)
+    st.session_state.snapshot_blob = encode_snapshot(st.session_state)
+
+
+def save_session(store, session_id):
+    """Queue a snapshot write only when the state changed since the last one."""
+    if not st.session_state.messages:
+        return
+    blob = encode_snapshot(st.session_state)
+    if blob != st.session_state.get("snapshot_blob"):
+        st.session_state.snapshot_blob = blob
+        store.submit(session_id, blob)
+
+
+snapshot_store = get_snapshot_store()
+session_id = get_session_id()
+if "hydrated" not in st.session_state:
+    st.session_state.hydrated = True
+    hydrate_session(snapshot_store, session_id)
+
 # --- Session State ---
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -148,6 +339,8 @@ if "answers" not in st.session_state:
 if "step" not in st.session_state:
     st.session_state.step = 0
 
+save_session(snapshot_store, session_id)
+
 # --- Response Definitions ---
 STEP_0_BLOCKS = [
     {
@@ -521,11 +714,12 @@ def render_chart_scrap_trend(key_prefix=""):
     with c1:
         st.markdown("<div style='padding-top: 10px;'>Select duration (Weeks):</div>", unsafe_allow_html=True)
     with c2:
+        # Default via session state so a restored snapshot value wins without a widget warning
+        st.session_state.setdefault(f"scrap_view_input_{key_prefix}", 6)
         num_weeks = st.number_input(
             "Select duration (Weeks):",
             min_value=1,
             max_value=12,
-            value=6,
             step=1,
             key=f"scrap_view_input_{key_prefix}",
             label_visibility="collapsed"